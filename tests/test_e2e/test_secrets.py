@@ -1,5 +1,7 @@
 import datetime
+import json
 import warnings
+from functools import lru_cache
 
 import pytest
 from ops.charm import CharmBase
@@ -9,17 +11,18 @@ from ops.model import Secret as ops_Secret
 from ops.model import SecretNotFoundError, SecretRotate
 
 from scenario import Context
+from scenario.context import DEFAULT_JUJU_VERSION
 from scenario.state import Relation, Secret, State
 from tests.helpers import trigger
 
 
-@pytest.fixture(scope="function")
+@pytest.fixture(scope="module")
 def mycharm():
     class MyCharm(CharmBase):
         def __init__(self, framework: Framework):
             super().__init__(framework)
-            for evt in self.on.events().values():
-                self.framework.observe(evt, self._on_event)
+            # update_status is the only event these tests emit on this charm
+            self.framework.observe(self.on.update_status, self._on_event)
 
         def _on_event(self, event):
             pass
@@ -27,26 +30,63 @@ def mycharm():
     return MyCharm
 
 
-def test_get_secret_no_secret(mycharm):
-    with Context(mycharm, meta={"name": "local"}).manager(
-        "update_status", State()
-    ) as mgr:
+@pytest.fixture(scope="module")
+def ctx_factory(mycharm):
+    @lru_cache(maxsize=None)
+    def _make(meta_json: str, juju_version: str) -> Context:
+        return Context(mycharm, meta=json.loads(meta_json), juju_version=juju_version)
+
+    def make(meta: dict, juju_version: str = DEFAULT_JUJU_VERSION) -> Context:
+        ctx = _make(json.dumps(meta, sort_keys=True), juju_version)
+        # contexts are shared across tests: drop side effects left by previous runs
+        ctx.cleanup()
+        return ctx
+
+    return make
+
+
+# shared between tests: State is deep-copied on each run, so this is never mutated
+_TWO_REV_CONTENTS = {0: {"a": "b"}, 1: {"a": "c"}}
+_FIXED_EXPIRE = datetime.datetime(2050, 12, 12)
+
+
+# "application" is deprecated but still supported
+@pytest.fixture(params=("app", "unit", "application"))
+def owner(request):
+    return request.param
+
+
+@pytest.fixture(params=(True, False))
+def app(request):
+    return request.param
+
+
+@pytest.fixture(scope="module")
+def make_secret():
+    def make(id: str = "foo", contents=_TWO_REV_CONTENTS, **kwargs) -> Secret:
+        return Secret(id=id, contents=contents, **kwargs)
+
+    return make
+
+
+def test_get_secret_no_secret(ctx_factory):
+    with ctx_factory(meta={"name": "local"}).manager("update_status", State()) as mgr:
         with pytest.raises(SecretNotFoundError):
             assert mgr.charm.model.get_secret(id="foo")
         with pytest.raises(SecretNotFoundError):
             assert mgr.charm.model.get_secret(label="foo")
 
 
-def test_get_secret(mycharm):
-    with Context(mycharm, meta={"name": "local"}).manager(
-        state=State(secrets=[Secret(id="foo", contents={0: {"a": "b"}}, granted=True)]),
+def test_get_secret(ctx_factory, make_secret):
+    with ctx_factory(meta={"name": "local"}).manager(
+        state=State(secrets=[make_secret(contents={0: {"a": "b"}}, granted=True)]),
         event="update_status",
     ) as mgr:
         assert mgr.charm.model.get_secret(id="foo").get_content()["a"] == "b"
 
 
-def test_get_secret_not_granted(mycharm):
-    with Context(mycharm, meta={"name": "local"}).manager(
+def test_get_secret_not_granted(ctx_factory):
+    with ctx_factory(meta={"name": "local"}).manager(
         state=State(secrets=[]),
         event="update_status",
     ) as mgr:
@@ -54,110 +94,54 @@ def test_get_secret_not_granted(mycharm):
             assert mgr.charm.model.get_secret(id="foo").get_content()["a"] == "b"
 
 
-@pytest.mark.parametrize("owner", ("app", "unit", "application"))
-# "application" is deprecated but still supported
-def test_get_secret_get_refresh(mycharm, owner):
-    with Context(mycharm, meta={"name": "local"}).manager(
+def test_get_secret_get_refresh(ctx_factory, make_secret, owner):
+    with ctx_factory(meta={"name": "local"}).manager(
         "update_status",
-        State(
-            secrets=[
-                Secret(
-                    id="foo",
-                    contents={
-                        0: {"a": "b"},
-                        1: {"a": "c"},
-                    },
-                    owner=owner,
-                )
-            ]
-        ),
+        State(secrets=[make_secret(owner=owner)]),
     ) as mgr:
         charm = mgr.charm
         assert charm.model.get_secret(id="foo").get_content(refresh=True)["a"] == "c"
 
 
-@pytest.mark.parametrize("app", (True, False))
-def test_get_secret_nonowner_peek_update(mycharm, app):
-    with Context(mycharm, meta={"name": "local"}).manager(
+def test_get_secret_nonowner_peek_update(ctx_factory, make_secret, app):
+    with ctx_factory(meta={"name": "local"}).manager(
         "update_status",
-        State(
-            leader=app,
-            secrets=[
-                Secret(
-                    id="foo",
-                    contents={
-                        0: {"a": "b"},
-                        1: {"a": "c"},
-                    },
-                ),
-            ],
-        ),
+        State(leader=app, secrets=[make_secret()]),
     ) as mgr:
-        charm = mgr.charm
-        assert charm.model.get_secret(id="foo").get_content()["a"] == "b"
-        assert charm.model.get_secret(id="foo").peek_content()["a"] == "c"
-        assert charm.model.get_secret(id="foo").get_content()["a"] == "b"
+        secret = mgr.charm.model.get_secret(id="foo")
+        assert secret.get_content()["a"] == "b"
+        assert secret.peek_content()["a"] == "c"
+        assert secret.get_content()["a"] == "b"
 
-        assert charm.model.get_secret(id="foo").get_content(refresh=True)["a"] == "c"
-        assert charm.model.get_secret(id="foo").get_content()["a"] == "c"
+        assert secret.get_content(refresh=True)["a"] == "c"
+        assert secret.get_content()["a"] == "c"
 
 
-@pytest.mark.parametrize("owner", ("app", "unit", "application"))
-# "application" is deprecated but still supported
-def test_get_secret_owner_peek_update(mycharm, owner):
-    with Context(mycharm, meta={"name": "local"}).manager(
+def test_get_secret_owner_peek_update(ctx_factory, make_secret, owner):
+    with ctx_factory(meta={"name": "local"}).manager(
         "update_status",
-        State(
-            secrets=[
-                Secret(
-                    id="foo",
-                    contents={
-                        0: {"a": "b"},
-                        1: {"a": "c"},
-                    },
-                    owner=owner,
-                )
-            ]
-        ),
+        State(secrets=[make_secret(owner=owner)]),
     ) as mgr:
-        charm = mgr.charm
-        assert charm.model.get_secret(id="foo").get_content()["a"] == "b"
-        assert charm.model.get_secret(id="foo").peek_content()["a"] == "c"
-        assert charm.model.get_secret(id="foo").get_content(refresh=True)["a"] == "c"
+        secret = mgr.charm.model.get_secret(id="foo")
+        assert secret.get_content()["a"] == "b"
+        assert secret.peek_content()["a"] == "c"
+        assert secret.get_content(refresh=True)["a"] == "c"
 
 
-@pytest.mark.parametrize("owner", ("app", "unit", "application"))
-# "application" is deprecated but still supported
-def test_secret_changed_owner_evt_fails(mycharm, owner):
+def test_secret_changed_owner_evt_fails(make_secret, owner):
     with pytest.raises(ValueError):
-        _ = Secret(
-            id="foo",
-            contents={
-                0: {"a": "b"},
-                1: {"a": "c"},
-            },
-            owner=owner,
-        ).changed_event
-
-
-@pytest.mark.parametrize("evt_prefix", ("rotate", "expired", "remove"))
-def test_consumer_events_failures(mycharm, evt_prefix):
-    with pytest.raises(ValueError):
-        _ = getattr(
-            Secret(
-                id="foo",
-                contents={
-                    0: {"a": "b"},
-                    1: {"a": "c"},
-                },
-            ),
-            evt_prefix + "_event",
-        )
+        _ = make_secret(owner=owner).changed_event
+
+
+def test_consumer_events_failures(make_secret):
+    secret = make_secret()
+    for evt_prefix in ("rotate", "expired", "remove"):
+        with pytest.raises(ValueError):
+            _ = getattr(secret, evt_prefix + "_event")
 
 
-@pytest.mark.parametrize("app", (True, False))
-def test_add(mycharm, app):
-    with Context(mycharm, meta={"name": "local"}).manager(
+def test_add(ctx_factory, app):
+    with ctx_factory(meta={"name": "local"}).manager(
         "update_status",
         State(leader=app),
     ) as mgr:
@@ -173,50 +157,19 @@ def test_add(mycharm, app):
     assert secret.label == "mylabel"
 
 
-def test_set_legacy_behaviour(mycharm):
-    # in juju < 3.1.7, secret owners always used to track the latest revision.
-    # ref: https://bugs.launchpad.net/juju/+bug/2037120
-    rev1, rev2, rev3 = {"foo": "bar"}, {"foo": "baz"}, {"foo": "baz", "qux": "roz"}
-    with Context(mycharm, meta={"name": "local"}, juju_version="3.1.6").manager(
-        "update_status",
-        State(),
-    ) as mgr:
-        charm = mgr.charm
-        secret: ops_Secret = charm.unit.add_secret(rev1, label="mylabel")
-        assert (
-            secret.get_content()
-            == secret.peek_content()
-            == secret.get_content(refresh=True)
-            == rev1
-        )
-
-        secret.set_content(rev2)
-        assert (
-            secret.get_content()
-            == secret.peek_content()
-            == secret.get_content(refresh=True)
-            == rev2
-        )
-
-        secret.set_content(rev3)
-        state_out = mgr.run()
-        assert (
-            secret.get_content()
-            == secret.peek_content()
-            == secret.get_content(refresh=True)
-            == rev3
-        )
-
-    assert state_out.secrets[0].contents == {
-        0: rev1,
-        1: rev2,
-        2: rev3,
-    }
-
-
-def test_set(mycharm):
+@pytest.mark.parametrize(
+    "juju_version, expect_latest",
+    (
+        (DEFAULT_JUJU_VERSION, False),
+        ("3.3.1", False),
+        # in juju < 3.1.7, secret owners always used to track the latest revision.
+        # ref: https://bugs.launchpad.net/juju/+bug/2037120
+        ("3.1.6", True),
+    ),
+)
+def test_set_content(ctx_factory, juju_version, expect_latest):
     rev1, rev2, rev3 = {"foo": "bar"}, {"foo": "baz"}, {"foo": "baz", "qux": "roz"}
-    with Context(mycharm, meta={"name": "local"}).manager(
+    with ctx_factory(meta={"name": "local"}, juju_version=juju_version).manager(
         "update_status",
         State(),
     ) as mgr:
@@ -230,12 +183,12 @@ def test_set(mycharm):
         )
 
         secret.set_content(rev2)
-        assert secret.get_content() == rev1
+        assert secret.get_content() == (rev2 if expect_latest else rev1)
         assert secret.peek_content() == secret.get_content(refresh=True) == rev2
 
         secret.set_content(rev3)
         state_out = mgr.run()
-        assert secret.get_content() == rev2
+        assert secret.get_content() == (rev3 if expect_latest else rev2)
         assert secret.peek_content() == secret.get_content(refresh=True) == rev3
 
     assert state_out.secrets[0].contents == {
@@ -245,44 +198,14 @@ def test_set(mycharm):
     }
 
 
-def test_set_juju33(mycharm):
-    rev1, rev2, rev3 = {"foo": "bar"}, {"foo": "baz"}, {"foo": "baz", "qux": "roz"}
-    with Context(mycharm, meta={"name": "local"}, juju_version="3.3.1").manager(
-        "update_status",
-        State(),
-    ) as mgr:
-        charm = mgr.charm
-        secret: ops_Secret = charm.unit.add_secret(rev1, label="mylabel")
-        assert secret.get_content() == rev1
-
-        secret.set_content(rev2)
-        assert secret.get_content() == rev1
-        assert secret.peek_content() == rev2
-        assert secret.get_content(refresh=True) == rev2
-
-        secret.set_content(rev3)
-        state_out = mgr.run()
-        assert secret.get_content() == rev2
-        assert secret.peek_content() == rev3
-        assert secret.get_content(refresh=True) == rev3
-
-    assert state_out.secrets[0].contents == {
-        0: rev1,
-        1: rev2,
-        2: rev3,
-    }
-
-
-@pytest.mark.parametrize("app", (True, False))
-def test_meta(mycharm, app):
-    with Context(mycharm, meta={"name": "local"}).manager(
+def test_meta(ctx_factory, make_secret, app):
+    with ctx_factory(meta={"name": "local"}).manager(
         "update_status",
         State(
             leader=True,
             secrets=[
-                Secret(
+                make_secret(
                     owner="app" if app else "unit",
-                    id="foo",
                     label="mylabel",
                     description="foobarbaz",
                     rotate=SecretRotate.HOURLY,
@@ -330,23 +253,28 @@ def test_secret_deprecation_granted(mycharm, granted):
     )
 
 
-@pytest.mark.parametrize("leader", (True, False))
-@pytest.mark.parametrize("owner", ("app", "unit", None))
-def test_secret_permission_model(mycharm, leader, owner):
-    expect_manage = bool(
+@pytest.mark.parametrize(
+    "leader, owner, expect_manage",
+    (
         # if you're the leader and own this app secret
-        (owner == "app" and leader)
+        pytest.param(True, "app", True, id="leader-app"),
+        pytest.param(False, "app", False, id="follower-app"),
         # you own this secret
-        or (owner == "unit")
-    )
-
-    with Context(mycharm, meta={"name": "local"}).manager(
+        pytest.param(True, "unit", True, id="leader-unit"),
+        pytest.param(False, "unit", True, id="follower-unit"),
+        # not yours: leadership is irrelevant
+        pytest.param(True, None, False, id="leader-nonowner"),
+    ),
+)
+def test_secret_permission_model(
+    ctx_factory, make_secret, leader, owner, expect_manage
+):
+    with ctx_factory(meta={"name": "local"}).manager(
         "update_status",
         State(
             leader=leader,
             secrets=[
-                Secret(
-                    id="foo",
+                make_secret(
                     label="mylabel",
                     description="foobarbaz",
                     rotate=SecretRotate.HOURLY,
@@ -358,14 +286,12 @@ def test_secret_permission_model(mycharm, leader, owner):
             ],
         ),
     ) as mgr:
-        secret = mgr.charm.model.get_secret(id="foo")
+        # can always view
+        secret: ops_Secret = mgr.charm.model.get_secret(id="foo")
         assert secret.get_content()["a"] == "b"
         assert secret.peek_content()
         assert secret.get_content(refresh=True)
 
-        # can always view
-        secret: ops_Secret = mgr.charm.model.get_secret(id="foo")
-
         if expect_manage:
             assert secret.get_content()
             assert secret.peek_content()
@@ -388,18 +314,17 @@ def test_secret_permission_model(mycharm, leader, owner):
                 secret.set_content(content={"boo": "foo"})
 
 
-@pytest.mark.parametrize("app", (True, False))
-def test_grant(mycharm, app):
-    with Context(
-        mycharm, meta={"name": "local", "requires": {"foo": {"interface": "bar"}}}
+def test_grant(ctx_factory, make_secret, app):
+    relation = Relation("foo", "remote")
+    with ctx_factory(
+        meta={"name": "local", "requires": {"foo": {"interface": "bar"}}}
     ).manager(
         "update_status",
         State(
-            relations=[Relation("foo", "remote")],
+            relations=[relation],
             secrets=[
-                Secret(
+                make_secret(
                     owner="unit",
-                    id="foo",
                     label="mylabel",
                     description="foobarbaz",
                     rotate=SecretRotate.HOURLY,
@@ -417,20 +342,17 @@ def test_grant(mycharm, app):
             secret.grant(relation=foo)
         else:
             secret.grant(relation=foo, unit=foo.units.pop())
-    vals = list(mgr.output.secrets[0].remote_grants.values())
-    assert vals == [{"remote"}] if app else [{"remote/0"}]
-
+    expected_grant = {"remote"} if app else {"remote/0"}
+    assert mgr.output.secrets[0].remote_grants == {relation.relation_id: expected_grant}
 
-def test_update_metadata(mycharm):
-    exp = datetime.datetime(2050, 12, 12)
 
-    with Context(mycharm, meta={"name": "local"}).manager(
+def test_update_metadata(ctx_factory, make_secret):
+    with ctx_factory(meta={"name": "local"}).manager(
         "update_status",
         State(
             secrets=[
-                Secret(
+                make_secret(
                     owner="unit",
-                    id="foo",
                     label="mylabel",
                     contents={
                         0: {"a": "b"},
@@ -443,7 +365,7 @@ def test_update_metadata(mycharm):
         secret.set_info(
             label="babbuccia",
             description="blu",
-            expire=exp,
+            expire=_FIXED_EXPIRE,
             rotate=SecretRotate.DAILY,
         )
 
@@ -451,7 +373,7 @@ def test_update_metadata(mycharm):
     assert secret_out.label == "babbuccia"
     assert secret_out.rotate == SecretRotate.DAILY
     assert secret_out.description == "blu"
-    assert secret_out.expire == exp
+    assert secret_out.expire == _FIXED_EXPIRE
 
 
 @pytest.mark.parametrize("leader", (True, False))
@@ -475,10 +397,8 @@ def test_grant_after_add(leader):
     context.run("start", state)
 
 
-def test_grant_nonowner(mycharm):
+def test_grant_nonowner(mycharm, make_secret):
     def post_event(charm: CharmBase):
-        secret = charm.model.get_secret(id="foo")
-
         secret = charm.model.get_secret(label="mylabel")
         foo = charm.model.get_relation("foo")
 
@@ -489,8 +409,7 @@ def test_grant_nonowner(mycharm):
         State(
             relations=[Relation("foo", "remote")],
             secrets=[
-                Secret(
-                    id="foo",
+                make_secret(
                     label="mylabel",
                     description="foobarbaz",
                     rotate=SecretRotate.HOURLY,
@@ -534,21 +453,24 @@ def test_add_grant_revoke_remove():
 
         secret.grant(bar_relation)
 
-    assert mgr.output.secrets
-    scenario_secret = mgr.output.secrets[0]
+    state_out = mgr.output
+    assert state_out.secrets
+    scenario_secret = state_out.secrets[0]
     assert relation_remote_app in scenario_secret.remote_grants[relation_id]
 
-    with context.manager("start", mgr.output) as mgr:
+    with context.manager("start", state_out) as mgr:
         charm: GrantingCharm = mgr.charm
         secret = charm.model.get_secret(label="mylabel")
-        secret.revoke(bar_relation)
+        secret.revoke(charm.model.relations["bar"][0])
 
-    scenario_secret = mgr.output.secrets[0]
+    state_out = mgr.output
+    scenario_secret = state_out.secrets[0]
     assert scenario_secret.remote_grants == {}
 
-    with context.manager("start", mgr.output) as mgr:
+    with context.manager("start", state_out) as mgr:
         charm: GrantingCharm = mgr.charm
         secret = charm.model.get_secret(label="mylabel")
         secret.remove_all_revisions()
 
-    assert not mgr.output.secrets[0].contents  # secret wiped
+    state_out = mgr.output
+    assert not state_out.secrets[0].contents  # secret wiped